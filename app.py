@@ -2,12 +2,21 @@
 
 import streamlit as st
 import pandas as pd
-from textblob import TextBlob
-import yfinance as yf
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
-from io import StringIO
+import os
+import glob
+import pickle
+import re
 import time
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from types import MappingProxyType
+import diskcache
 
 # --- CONFIGURATION & CONSTANTS ---
 try:
@@ -20,6 +29,33 @@ except (KeyError, FileNotFoundError):
 
 NEWS_RSS_URL = "https://news.google.com/rss?hl=en-IN&gl=IN&ceid=IN:en"
 STOCK_LIST_CSV = "nifty500_stocks.csv"
+TOP_RECOMMENDATIONS = 3
+YF_BATCH_SIZE = 20  # Yahoo caps the number of symbols per request.
+# Disk cache value (and tag) for symbols Yahoo had no usable prices for today. A
+# string, because diskcache's SQLite backend would read a stored NaN back as None.
+NO_PRICE_DATA = "no-data"
+NEWS_RETRY_COOLDOWN = 60  # Seconds to wait before refetching a feed that just failed.
+STOCK_MAP_CACHE_VERSION = 2  # Bump when the pickled stock map layout changes.
+# RSS needs no ID index or entity expansion, and should tolerate minor markup errors.
+RSS_PARSER_OPTIONS = {'collect_ids': False, 'resolve_entities': False, 'huge_tree': False, 'recover': True}
+
+@st.cache_resource
+def get_performance_cache():
+    """Opens the on-disk store of per-symbol daily returns once per process."""
+    return diskcache.Cache("./.yf_cache")
+
+PERFORMANCE_CACHE = get_performance_cache()
+
+@st.cache_resource
+def get_http_session():
+    """One keep-alive session per process, shared by the RSS fetch and Telegram alerts across reruns."""
+    session = requests.Session()
+    session.headers.update({'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'gzip, deflate'})
+    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+    session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries))
+    return session
+
+SESSION = get_http_session()
 
 SECTOR_KEYWORDS = {
     'AUTOMOBILE & AUTO COMPONENTS': ['auto', 'maruti', 'mahindra', 'tata motors', 'hero', 'bajaj', 'ev', 'automotive'],
@@ -29,144 +65,378 @@ SECTOR_KEYWORDS = {
     'OIL GAS & FUELS': ['oil', 'gas', 'ongc', 'reliance', 'bpcl', 'crude', 'energy', 'fuel'],
     'METALS & MINING': ['metal', 'steel', 'tata steel', 'jsw', 'hindalco', 'coal', 'mining'],
 }
+
+# Sector priority follows SECTOR_KEYWORDS order, same as the original nested loop.
+# Names and keywords are normalised here, not per call. Keywords must start at a word
+# boundary (so 'it' no longer matches 'profit'); short ones (abbreviations like 'it',
+# 'ev', 'sbi') must also end at one, longer ones may take suffixes.
+SHORT_KEYWORD_LEN = 3
+_SECTOR_TABLE = tuple((sector.upper(), tuple(k.lower() for k in keywords)) for sector, keywords in SECTOR_KEYWORDS.items())
+_SECTOR_ORDER = {sector: i for i, (sector, _) in enumerate(_SECTOR_TABLE)}
+_KEYWORD_SECTOR = {}
+for sector, keywords in _SECTOR_TABLE:
+    for keyword in keywords:
+        _KEYWORD_SECTOR.setdefault(keyword, sector)
+
+@st.cache_resource
+def get_sector_matcher(keyword_sectors):
+    """
+    Builds the keyword matcher for (keyword, sector) pairs once per process and
+    returns (automaton, pattern), exactly one of which is set: an Aho-Corasick
+    automaton when pyahocorasick is installed, otherwise one compiled regex
+    alternation. The pairs are the cache key, so editing SECTOR_KEYWORDS rebuilds it.
+    """
+    try:
+        import ahocorasick
+    except ImportError:
+        # The lookahead lets the regex also find overlapping keywords.
+        pattern = re.compile(r"(?=\b(" + "|".join(
+            re.escape(k) + (r"\b" if len(k) <= SHORT_KEYWORD_LEN else "") for k, _ in keyword_sectors
+        ) + "))")
+        return None, pattern
+    automaton = ahocorasick.Automaton()
+    for keyword, sector in keyword_sectors:
+        automaton.add_word(keyword, (sector, len(keyword)))
+    automaton.make_automaton()
+    return automaton, None
+
+SECTOR_MATCHER = get_sector_matcher(tuple(_KEYWORD_SECTOR.items()))
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # ========= 📰 STEP 1: DATA INGESTION =========
 
-@st.cache_data(ttl=1800)
-def fetch_news_from_rss(url):
-    """Fetches news headlines from the Google News RSS feed."""
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=15)
+@st.cache_data(ttl=1200)
+def download_news(url):
+    """Downloads and parses the RSS feed. Raises on failure, so failures are never cached."""
+    titles, links, seen = [], [], set()
+    # Stream the (gzip-decoded) body straight into the parser, no full-body copy.
+    with SESSION.get(url, timeout=15, stream=True) as response:
         response.raise_for_status()
-        df = pd.read_xml(StringIO(response.text))
-        if 'title' in df.columns and 'link' in df.columns:
-            st.success("✅ Successfully fetched latest news.")
-            return df[['title', 'link']].head(20)
-    except Exception as e:
-        st.error(f"Failed to fetch news: {e}")
+        response.raw.decode_content = True
+        for _, elem in etree.iterparse(response.raw, events=("end",), tag="item", **RSS_PARSER_OPTIONS):
+            title = elem.findtext("title")
+            # The same story is often syndicated under several "... - Source" suffixes; keep the first.
+            story = title.rsplit(' - ', 1)[0] if title else None
+            if story and story not in seen:
+                seen.add(story)
+                titles.append(title)
+                links.append(elem.findtext("link"))
+            # Drop parsed items so memory stays flat while streaming.
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+            if len(titles) >= 20:
+                break
+    if not titles:
+        raise ValueError("the feed contained no items")
+    return pd.DataFrame({'title': titles, 'link': links})
+
+@st.cache_resource
+def get_last_good_news():
+    """
+    Per feed URL, the last successfully fetched headlines and the last failure
+    (error and monotonic time), shared by all sessions.
+    """
+    return {}
+
+def news_refresh_due(url):
+    """False while a failed feed is cooling down, so an outage is not refetched on every rerun."""
+    failed_at = get_last_good_news().get(url, {}).get('failed_at')
+    return failed_at is None or time.monotonic() - failed_at >= NEWS_RETRY_COOLDOWN
+
+def fetch_news_from_rss(url, pending):
+    """
+    Resolves a pending `download_news` call for the Google News RSS feed, or
+    reuses the recorded outcome when `pending` is None during a cooldown. If
+    the refresh fails, the last successfully fetched headlines are served
+    instead of an empty page. Runs on the script thread so its status messages
+    render there.
+    """
+    state = get_last_good_news().setdefault(url, {'df': None, 'error': None, 'failed_at': None})
+    if pending is not None:
+        try:
+            state['df'] = pending.result()
+            state['error'] = state['failed_at'] = None
+        except Exception as e:
+            state['error'], state['failed_at'] = e, time.monotonic()
+    if state['error'] is None:
+        st.success("✅ Successfully fetched latest news.")
+        return state['df']
+    if state['df'] is not None:
+        st.warning(f"Failed to refresh news ({state['error']}). Showing the last fetched headlines.")
+        return state['df']
+    st.error(f"Failed to fetch news: {state['error']}")
     return pd.DataFrame()
 
-@st.cache_data
+def _write_stock_map_cache(pickle_path, sector_stocks):
+    """Atomically writes the parsed stock map and removes caches of older CSV versions."""
+    tmp_path = f"{pickle_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(sector_stocks, f, protocol=5)
+        os.replace(tmp_path, pickle_path)
+    except OSError as e:
+        logging.warning(f"Could not write stock list cache {pickle_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    for stale_path in glob.glob(f"{glob.escape(STOCK_LIST_CSV)}.*.pkl"):
+        if stale_path != pickle_path:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+
+@st.cache_resource
 def load_nse_stocks():
-    """Loads the master list of NIFTY 500 stocks and their industries from a CSV file."""
+    """
+    Loads the master list of NIFTY 500 stocks and their industries from a CSV file.
+    The parsed mapping is pickled next to the CSV, keyed by its mtime, so restarts
+    skip the CSV parse until the file changes. It is returned read-only so one
+    instance can be shared without copying. Returns the mapping and an error
+    message (None on success); it makes no st.* calls so it can run off the
+    script thread.
+    """
     try:
-        df = pd.read_csv(STOCK_LIST_CSV)
+        mtime = os.path.getmtime(STOCK_LIST_CSV)
+        pickle_path = f"{STOCK_LIST_CSV}.{int(mtime)}.v{STOCK_MAP_CACHE_VERSION}.pkl"
+        if os.path.exists(pickle_path):
+            try:
+                with open(pickle_path, 'rb') as f:
+                    sector_stocks = pickle.load(f)
+                return MappingProxyType(sector_stocks), None
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logging.warning(f"Ignoring unreadable stock list cache {pickle_path}: {e}")
         stock_column, industry_column = 'Symbol', 'Industry'
+        df = pd.read_csv(STOCK_LIST_CSV, usecols=lambda c: c in (stock_column, industry_column), dtype=str)
         if stock_column not in df.columns or industry_column not in df.columns:
-            st.error(f"CRITICAL ERROR: CSV is missing '{stock_column}' or '{industry_column}'.")
-            st.code(f"Columns found: {list(df.columns)}")
-            return {}
-        df[industry_column] = df[industry_column].str.upper().str.strip()
-        st.success("✅ Successfully loaded the NIFTY 500 stock list.")
-        return df.groupby(industry_column)[stock_column].apply(list).to_dict()
+            columns = list(pd.read_csv(STOCK_LIST_CSV, nrows=0).columns)
+            return {}, f"CRITICAL ERROR: CSV is missing '{stock_column}' or '{industry_column}'. Columns found: {columns}"
+        df = df.dropna(subset=[stock_column])
+        df = df.assign(**{industry_column: df[industry_column].str.strip().str.upper()})
+        sector_stocks = {sector: tuple(sorted(symbols)) for sector, symbols in df.groupby(industry_column, sort=False)[stock_column]}
+        _write_stock_map_cache(pickle_path, sector_stocks)
+        return MappingProxyType(sector_stocks), None
     except FileNotFoundError:
-        st.error(f"CRITICAL ERROR: `{STOCK_LIST_CSV}` not found. Please upload it to GitHub.")
-        return {}
+        return {}, f"CRITICAL ERROR: `{STOCK_LIST_CSV}` not found. Please upload it to GitHub."
 
 # ========= 🧠 STEP 2: PROCESSING & ENRICHMENT =========
 
-def analyze_sentiment(text):
-    """Analyzes a headline, returning a sentiment label (POSITIVE/NEGATIVE) and a score."""
+@st.cache_resource
+def get_sentiment_analyzer():
+    """Builds the VADER analyzer once per process; its lexicon load is not repeated on reruns."""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+def analyze_sentiment(text, analyzer=None):
+    """
+    Analyzes a headline, returning a sentiment label (POSITIVE/NEGATIVE) and a score.
+    Batch callers pass the analyzer so it is looked up once, not per headline.
+    """
     text_cleaned = text.rsplit(' - ', 1)[0]
-    analysis = TextBlob(text_cleaned)
-    score = analysis.sentiment.polarity
+    score = (analyzer or get_sentiment_analyzer()).polarity_scores(text_cleaned)['compound']
     label = 'POSITIVE' if score > 0.1 else 'NEGATIVE' if score < -0.1 else 'NEUTRAL'
     return label, score
 
+def _is_word_char(text, i):
+    """True if text[i] exists and is a regex word character (the \\b test used by the fallback)."""
+    return 0 <= i < len(text) and (text[i].isalnum() or text[i] == '_')
+
 def map_headline_to_sector(headline):
     """Matches a headline to a predefined sector using keywords."""
     headline_lower = headline.lower()
-    for sector, keywords in SECTOR_KEYWORDS.items():
-        if any(keyword in headline_lower for keyword in keywords):
-            return sector.upper()
-    return None
+    automaton, pattern = SECTOR_MATCHER
+    if automaton is not None:
+        matches = {
+            sector for end, (sector, length) in automaton.iter(headline_lower)
+            if not _is_word_char(headline_lower, end - length)
+            and (length > SHORT_KEYWORD_LEN or not _is_word_char(headline_lower, end + 1))
+        }
+    else:
+        matches = {_KEYWORD_SECTOR[m] for m in pattern.findall(headline_lower)}
+    if not matches:
+        return None
+    return min(matches, key=_SECTOR_ORDER.__getitem__)
+
+@st.cache_data(ttl=1800)
+def annotate_news(titles):
+    """
+    Runs sentiment and sector mapping once over all headlines and returns the
+    actionable ones (mapped to a sector, non-neutral) as a DataFrame with
+    title, headline (source suffix stripped), sentiment, score and sector columns.
+    The keyword scan is far cheaper than sentiment scoring, so only mapped
+    headlines get scored.
+    """
+    columns = ['title', 'headline', 'sentiment', 'score', 'sector']
+    df = pd.DataFrame({'title': titles, 'sector': [map_headline_to_sector(t) for t in titles]}).dropna(subset=['sector'])
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    analyzer = get_sentiment_analyzer()
+    df[['sentiment', 'score']] = pd.DataFrame([analyze_sentiment(t, analyzer) for t in df['title']], index=df.index, columns=['sentiment', 'score'])
+    df = df[df['sentiment'] != 'NEUTRAL']
+    df = df.assign(headline=df['title'].str.rsplit(' - ', n=1).str[0])
+    return df[columns]
 
 # ========= 🔍 STEP 3: STOCK FILTERING & ANALYSIS =========
 
 @st.cache_data(ttl=86400)
-def analyze_stock_performance(symbol):
-    """Analyzes a single stock's historical performance (average daily return)."""
-    try:
-        stock_data = yf.download(f"{symbol}.NS", period="6mo", progress=False)
-        if stock_data.empty: return None
-        return {'symbol': symbol, 'avg_return': stock_data['Close'].pct_change().mean()}
-    except Exception:
-        return None
+def analyze_sector_performance(symbols):
+    """
+    Analyzes a sector's stocks (average daily return) with batched multi-ticker
+    downloads of up to YF_BATCH_SIZE symbols each.
+    Results are also kept on disk per symbol and day, so only symbols missing
+    from the disk cache hit the network after a restart or cache clear.
+    Symbols with no usable prices are stored as NO_PRICE_DATA, so they are not
+    refetched until the next day or a cache clear.
+    Returns a Series of average daily returns indexed by symbol.
+    """
+    today = date.today().isoformat()
+    cache_miss = object()
+    cached = {s: PERFORMANCE_CACHE.get((s, today), default=cache_miss) for s in symbols}
+    avg_returns = {s: ret for s, ret in cached.items() if isinstance(ret, float)}
+    missing = [s for s, ret in cached.items() if ret is cache_miss]
+    if missing:
+        # Imported here so reruns served from cache never pay yfinance's import cost.
+        import yfinance as yf
+        closes, answered = [], []
+        for start in range(0, len(missing), YF_BATCH_SIZE):
+            batch = missing[start:start + YF_BATCH_SIZE]
+            try:
+                tickers = " ".join(f"{s}.NS" for s in batch)
+                stock_data = yf.download(tickers=tickers, period="6mo", interval="1d", actions=False, group_by="ticker", threads=True, progress=False)
+            except Exception:
+                continue
+            if stock_data.empty:
+                continue
+            batch_close = stock_data.xs("Close", level=1, axis=1)
+            closes.append(batch_close)
+            # yfinance reports network and rate-limit failures as missing data, so a batch
+            # only counts as answered when at least one of its tickers has prices.
+            if batch_close.notna().to_numpy().any():
+                answered.extend(batch)
+        if closes:
+            close = pd.concat(closes, axis=1).dropna(axis=1, how="all").ffill()
+            # Zero, negative and non-finite prices are treated as gaps, so no return is ever inf.
+            prices = close.to_numpy(dtype=float)
+            prices = np.where(np.isfinite(prices) & (prices > 0), prices, np.nan)
+            daily_returns = np.diff(prices, axis=0) / prices[:-1]
+            valid = np.isfinite(daily_returns)
+            count = valid.sum(axis=0)
+            # Symbols with fewer than two prices come out as NaN and get the marker below.
+            mean_returns = np.where(count > 0, np.where(valid, daily_returns, 0.0).sum(axis=0) / np.maximum(count, 1), np.nan)
+            for ticker, ret in zip(close.columns, mean_returns.tolist()):
+                if np.isfinite(ret):
+                    symbol = ticker.removesuffix(".NS")
+                    PERFORMANCE_CACHE.set((symbol, today), ret, expire=86400)
+                    avg_returns[symbol] = ret
+        # Symbols an answered batch had no usable prices for (delisted, renamed) get the
+        # marker; symbols from failed batches stay uncached so they are retried.
+        for symbol in answered:
+            if symbol not in avg_returns:
+                PERFORMANCE_CACHE.set((symbol, today), NO_PRICE_DATA, expire=86400, tag=NO_PRICE_DATA)
+    avg_returns = pd.Series(avg_returns, dtype=float, name='avg_return')
+    return avg_returns[np.isfinite(avg_returns)]
 
 # ========= ⚖️ STEP 4: DECISION ENGINE =========
 
+@st.cache_data(ttl=3600)
 def generate_recommendations(sentiment, stocks_to_analyze):
     """
     Applies the core BUY/AVOID logic based on sentiment and stock performance.
     This is the heart of the "AI" agent.
     """
     with st.spinner(f"Analyzing {len(stocks_to_analyze)} stocks..."):
-        valid_stocks = [s for s in [analyze_stock_performance(s) for s in stocks_to_analyze] if s is not None]
+        avg_returns = analyze_sector_performance(stocks_to_analyze)
 
     if sentiment == 'POSITIVE':
-        # Rule: Keep stocks with positive historical performance trend.
-        recommendations = [s for s in valid_stocks if s['avg_return'] > 0.001]
-        # Sort by best performance first.
-        return sorted(recommendations, key=lambda x: x['avg_return'], reverse=True)
+        # Rule: Keep stocks with positive historical performance trend, best performance first.
+        top = avg_returns[avg_returns > 0.001].nlargest(TOP_RECOMMENDATIONS)
     elif sentiment == 'NEGATIVE':
-        # Rule: Keep stocks with negative historical performance trend.
-        recommendations = [s for s in valid_stocks if s['avg_return'] < -0.001]
-        # Sort by worst performance first.
-        return sorted(recommendations, key=lambda x: x['avg_return'])
-    return []
+        # Rule: Keep stocks with negative historical performance trend, worst performance first.
+        top = avg_returns[avg_returns < -0.001].nsmallest(TOP_RECOMMENDATIONS)
+    else:
+        return []
+    return [{'symbol': symbol, 'avg_return': ret} for symbol, ret in top.items()]
 
 # ========= 📤 STEP 5: ALERTING & OUTPUT =========
 
 def format_telegram_message(headline_info, recommendations):
     """Formats the final recommendation into a human-readable string for Telegram."""
-    headline, sentiment, score, sector = headline_info.values()
-    message = f"🚨 *AI Market Advisor Alert*\n\n📰 *Headline:* {headline}\n📊 *Sentiment:* {sentiment} (Score: {score:.2f})\n🏭 *Affected Sector:* {sector}\n\n"
-    message += "📈 *Top BUY Recommendations:*\n" if sentiment == 'POSITIVE' else "📉 *Top AVOID Recommendations:*\n"
+    headline, sentiment, score, sector = (headline_info[k] for k in ('headline', 'sentiment', 'score', 'sector'))
+    parts = [
+        f"🚨 *AI Market Advisor Alert*\n\n📰 *Headline:* {headline}\n📊 *Sentiment:* {sentiment} (Score: {score:.2f})\n🏭 *Affected Sector:* {sector}\n\n",
+        "📈 *Top BUY Recommendations:*\n" if sentiment == 'POSITIVE' else "📉 *Top AVOID Recommendations:*\n",
+    ]
     if not recommendations:
-        message += "_No stocks met the filter criteria._"
+        parts.append("_No stocks met the filter criteria._")
+    else:
+        parts.extend(f"  - *{stock['symbol']}* (Avg Daily Return: {stock['avg_return'] * 100:.3f}%)\n" for stock in recommendations)
+    return "".join(parts)
+
+@st.cache_resource
+def get_telegram_pool():
+    """Small background pool, shared across reruns, that delivers Telegram alerts."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="telegram")
+
+def _post_telegram_message(url, payload, telegram_log):
+    """
+    Posts one alert; failures are recorded in telegram_log for the next rerun to show.
+    The URL embeds the bot token, so errors report only the status code and
+    Telegram's description (or the exception type), never the exception text.
+    """
+    try:
+        response = SESSION.post(url, json=payload, timeout=10)
+    except Exception as e:
+        error = type(e).__name__
     else:
-        for stock in recommendations:
-            message += f"  - *{stock['symbol']}* (Avg Daily Return: {stock['avg_return'] * 100:.3f}%)\n"
-    return message
+        if response.ok:
+            return
+        try:
+            description = response.json().get('description', response.reason)
+        except ValueError:
+            description = response.reason
+        error = f"HTTP {response.status_code}: {description}"
+    logging.error(f"Telegram alert failed: {error}")
+    telegram_log.append(f"Failed to send Telegram alert: {error}")
 
 def send_telegram_message(message):
-    """Sends the formatted message to the configured Telegram chat."""
+    """Queues the formatted message for the configured Telegram chat without blocking the UI."""
     if not TELEGRAM_TOKEN or not TELEGRAM_CHAT_ID:
         st.warning("Telegram is not configured.")
         return
     url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
     payload = {'chat_id': TELEGRAM_CHAT_ID, 'text': message, 'parse_mode': 'Markdown'}
-    requests.post(url, json=payload)
-    st.toast("✅ Alert sent to Telegram!")
+    telegram_log = st.session_state.setdefault("telegram_log", [])
+    get_telegram_pool().submit(_post_telegram_message, url, payload, telegram_log)
+    st.toast("✅ Alert queued for Telegram!")
 
 # ========= MAIN ORCHESTRATOR & UI =========
 
-@st.cache_data
-def run_full_analysis(news_df, sector_stocks_map):
+# The stock map is a shared read-only instance, so its identity is a sufficient cache key.
+@st.cache_data(ttl=1800, hash_funcs={MappingProxyType: id})
+def run_full_analysis(titles, sector_stocks_map):
     """
     The main controller that runs the entire analysis pipeline (Steps 2-4)
     for all news headlines and returns a list of structured results.
     """
     results = []
-    for _, row in news_df.iterrows():
-        headline = row['title']
-        sentiment, score = analyze_sentiment(headline)
-        
-        if sentiment != 'NEUTRAL':
-            mapped_sector = map_headline_to_sector(headline)
-            if mapped_sector:
-                stocks_in_sector = sector_stocks_map.get(mapped_sector, [])
-                if stocks_in_sector:
-                    recommendations = generate_recommendations(sentiment, stocks_in_sector)
-                    results.append({
-                        'headline': headline.rsplit(' - ', 1)[0],
-                        'sentiment': sentiment,
-                        'score': score,
-                        'sector': mapped_sector,
-                        'recommendations': recommendations
-                    })
+    # Several headlines often hit the same sector; rank each (sector, sentiment) pair once.
+    picks = {}
+    for row in annotate_news(titles).itertuples():
+        stocks_in_sector = sector_stocks_map.get(row.sector, ())
+        if stocks_in_sector:
+            key = (row.sector, row.sentiment)
+            if key not in picks:
+                picks[key] = generate_recommendations(row.sentiment, stocks_in_sector)
+            recommendations = picks[key]
+            results.append({
+                'headline': row.headline,
+                'sentiment': row.sentiment,
+                'score': row.score,
+                'sector': row.sector,
+                'recommendations': recommendations
+            })
     return results
 
 
@@ -178,12 +448,27 @@ with st.sidebar:
     st.header("Controls")
     if st.button("🔄 Clear Cache and Rerun"):
         st.cache_data.clear()
+        st.cache_resource.clear()
+        PERFORMANCE_CACHE.evict(NO_PRICE_DATA)
         st.rerun()
     st.header("Data Status")
     
     # --- Execute Step 1: Data Ingestion ---
-    sector_stocks_map = load_nse_stocks()
-    news_df = fetch_news_from_rss(NEWS_RSS_URL)
+    # The CSV load and the RSS fetch are independent, so overlap them. The workers
+    # only load data; status messages are rendered here on the script thread.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        f_stocks = ex.submit(load_nse_stocks)
+        f_news = ex.submit(download_news, NEWS_RSS_URL) if news_refresh_due(NEWS_RSS_URL) else None
+        sector_stocks_map, stocks_error = f_stocks.result()
+        if stocks_error:
+            st.error(stocks_error)
+        else:
+            st.success("✅ Successfully loaded the NIFTY 500 stock list.")
+        news_df = fetch_news_from_rss(NEWS_RSS_URL, f_news)
+
+    telegram_log = st.session_state.get("telegram_log", [])
+    while telegram_log:
+        st.error(telegram_log.pop(0))
     
     st.warning("**Disclaimer:** This is for educational purposes. Not financial advice.")
 
@@ -200,7 +485,7 @@ if news_df.empty or not sector_stocks_map:
     st.warning("Analysis cannot run until all data is loaded successfully.")
 else:
     # --- Run the full analysis pipeline ---
-    analysis_results = run_full_analysis(news_df, sector_stocks_map)
+    analysis_results = run_full_analysis(tuple(news_df['title']), sector_stocks_map)
     
     if not analysis_results:
         st.info("No news headlines matched the criteria for generating suggestions.")
@@ -215,10 +500,9 @@ else:
                     st.info("No stocks in this sector met the strict filter criteria.")
                 else:
                     st.write("**Top Recommendations:**")
-                    rec_df = pd.DataFrame(result['recommendations'][:3])
-                    rec_df['avg_return'] = rec_df['avg_return'].map('{:.3%}'.format)
-                    st.dataframe(rec_df, use_container_width=True, hide_index=True)
+                    rec_rows = [{'symbol': s['symbol'], 'avg_return': f"{s['avg_return']:.3%}"} for s in result['recommendations']]
+                    st.dataframe(rec_rows, use_container_width=True, hide_index=True)
                     
                     if st.button("Send Alert", key=f"send_{i}"):
-                        message = format_telegram_message(result, result['recommendations'][:3])
+                        message = format_telegram_message(result, result['recommendations'])
                         send_telegram_message(message)